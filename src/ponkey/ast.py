@@ -1,20 +1,21 @@
-from abc import ABCMeta, abstractmethod
-
 from ponkey.token import Token, TokenType
 
 
-class Node(metaclass=ABCMeta):
-    """ASTを構成するノードの抽象基底クラス
+class Node:
+    """ASTを構成するノードの基底クラス
 
     token_literalメソッドは、ノードが関連付けられているトークンのリテラル値を返す。
     stringメソッドは、ノードのデバッグ用文字列表現を返す。
+
+    ABCMetaを使うとノードに対するisinstanceの判定がABCMeta.__instancecheck__を経由して遅くなるため、
+    抽象メソッドは使わず、サブクラスで実装すべきメソッドはNotImplementedErrorを送出する。
     """
 
-    @abstractmethod
+    __slots__ = ()
+
     def token_literal(self) -> str:
         raise NotImplementedError
 
-    @abstractmethod
     def string(self) -> str:
         raise NotImplementedError
 
@@ -26,7 +27,8 @@ class Statement(Node):
     エラーを教えてくれるようにできるかもしれないから
     """
 
-    @abstractmethod
+    __slots__ = ()
+
     def statement_node(self) -> None:
         raise NotImplementedError
 
@@ -41,7 +43,8 @@ class Expression(Node):
     エラーを教えてくれるようにできるかもしれないから
     """
 
-    @abstractmethod
+    __slots__ = ()
+
     def expression_node(self) -> None:
         raise NotImplementedError
 
@@ -67,6 +70,8 @@ class Program(Node):
             プログラム内のすべての文を連結した文字列を返します。
     """
 
+    __slots__ = ("statements",)
+
     def __init__(self, statements: list[Statement] | None = None) -> None:
         if statements is None:
             self.statements = []
@@ -90,9 +95,11 @@ class Program(Node):
 
 
 class Identifier(Expression):
+    __slots__ = ("token", "value")
+
     def __init__(self, token: Token, value: str) -> None:
         if token.type != TokenType.IDENT:
-            raise ValueError(f"token.type is not TokenType.IDENT {TokenType.IDENT}")
+            raise ValueError("token.type is not TokenType.IDENT")
         self.token = token  # TokenType.IDENT
         self.value = value
 
@@ -132,14 +139,16 @@ class LetStatement(Statement):
             'let'文を文字列として返します。nameがNoneの場合はValueErrorを発生させます。
     """
 
+    __slots__ = ("token", "name", "value")
+
     def __init__(
         self,
         token: Token,
         name: Identifier | None = None,
         value: Expression | None = None,
     ) -> None:
-        if token.literal != TokenType.LET:
-            raise ValueError(f"token.literal is not TokenType.LET {TokenType.LET}")
+        if token.type != TokenType.LET:
+            raise ValueError("token.type is not TokenType.LET")
         self.token = token  # TokenType.LET
         self.name = name
         self.value = value
@@ -153,11 +162,8 @@ class LetStatement(Statement):
     def string(self) -> str:
         if self.name is None:
             raise ValueError("self.name is None")
-        out = f"{self.token_literal()} {self.name.string()} = "
-        if self.value:
-            out += self.value.string()
-        out += ";"
-        return out
+        value = self.value.string() if self.value else ""
+        return f"{self.token_literal()} {self.name.string()} = {value};"
 
 
 class ReturnStatement(Statement):
@@ -168,11 +174,11 @@ class ReturnStatement(Statement):
     ReturnStatementはreturnのトークンと式を保持する。
     """
 
+    __slots__ = ("token", "return_value")
+
     def __init__(self, token: Token) -> None:
-        if token.literal != TokenType.RETURN:
-            raise ValueError(
-                f"token.literal is not TokenType.RETURN {TokenType.RETURN}"
-            )
+        if token.type != TokenType.RETURN:
+            raise ValueError("token.type is not TokenType.RETURN")
         self.token = token
         self.return_value: Expression | None = None
 
@@ -183,11 +189,8 @@ class ReturnStatement(Statement):
         return self.token.literal
 
     def string(self) -> str:
-        out = f"{self.token_literal()}"
-        if self.return_value:
-            out += self.return_value.string()
-        out += ";"
-        return out
+        return_value = self.return_value.string() if self.return_value else ""
+        return f"{self.token_literal()} {return_value};"
 
 
 class ExpressionStatement(Statement):
@@ -200,6 +203,8 @@ class ExpressionStatement(Statement):
         expression (Expression | None): 式文の式
     """
 
+    __slots__ = ("token", "expression")
+
     def __init__(
         self, token: Token | None, expression: Expression | None = None
     ) -> None:
@@ -224,9 +229,11 @@ class ExpressionStatement(Statement):
 
 
 class IntegerLiteral(Expression):
+    __slots__ = ("token", "value")
+
     def __init__(self, token: Token, value: int | None = None) -> None:
         if token.type != TokenType.INT:
-            raise ValueError(f"token.type is not TokenType.INT {TokenType.INT}")
+            raise ValueError("token.type is not TokenType.INT")
         self.token = token
         self.value = value
 
@@ -241,6 +248,8 @@ class IntegerLiteral(Expression):
 
 
 class PrefixExpression(Expression):
+    __slots__ = ("token", "operator", "right")
+
     def __init__(
         self, token: Token, operator: str, right: Expression | None = None
     ) -> None:
@@ -255,4 +264,5 @@ class PrefixExpression(Expression):
         return self.token.literal
 
     def string(self) -> str:
-        return f"({self.operator}{self.right.string()})"
+        right = self.right.string() if self.right else ""
+        return f"({self.operator}{right})"
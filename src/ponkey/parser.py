@@ -1,3 +1,4 @@
+import functools
 from enum import IntEnum, auto
 from typing import Callable
 
@@ -12,11 +13,14 @@ from ponkey.ast import (
     ReturnStatement,
     Statement,
 )
-from ponkey.token import Token, TokenType
+from ponkey.token import EOF_TOKEN, TOKEN_LITERAL, Token, TokenType
 from ponkey.tokenizer import Tokenizer
 
+StatementParseFn = Callable[[], Statement | None]
 PrefixParseFn = Callable[[], Expression]
 InfixParseFn = Callable[[Expression], Expression]
+ParseExpressionMethod = Callable[["Parser", "Priority"], Expression | None]
+MemoEntry = tuple[Expression | None, int, Token, Token]
 
 
 class Priority(IntEnum):
@@ -31,7 +35,97 @@ class Priority(IntEnum):
     CALL = auto()  # mu_function(X)
 
 
+# トークンの種類ごとの中置演算子としての優先順位
+_PRIORITY_OF_TOKEN: dict[int, Priority] = {
+    TokenType.EQ: Priority.EQUALS,
+    TokenType.NEQ: Priority.EQUALS,
+    TokenType.LT: Priority.LESSGREATER,
+    TokenType.GT: Priority.LESSGREATER,
+    TokenType.PLUS: Priority.SUM,
+    TokenType.MINUS: Priority.SUM,
+    TokenType.ASTERISK: Priority.PRODUCT,
+    TokenType.SLASH: Priority.PRODUCT,
+    TokenType.LPAREN: Priority.CALL,
+}
+# TokenTypeの値をそのまま添字にして引けるよう、上の辞書をタプルに展開したもの
+# 中置演算子でないトークンはLOWESTになる
+_PRIORITIES: tuple[Priority, ...] = tuple(
+    _PRIORITY_OF_TOKEN.get(token_type, Priority.LOWEST)
+    for token_type in range(max(TOKEN_LITERAL) + 1)
+)
+
+
+# parse_expressionの結果をメモ化するかどうか
+# 今のパーサーはバックトラックしないので、同じ位置・同じ優先順位で式を解析し直すことはなく、
+# メモ化してもキャッシュに書き込むだけで一度も当たらない. そのため既定では無効にしておく
+MEMOIZE_EXPRESSIONS = False
+
+
+def memoize_if(
+    enabled: bool,
+) -> Callable[[ParseExpressionMethod], ParseExpressionMethod]:
+    """enabledがTrueのときだけ、parse_expressionの結果をメモ化するデコレータ
+
+    キャッシュのキーは(Tokenizerの読み取り位置, 優先順位)で、キャッシュはParser._memoに持つ。
+    キャッシュに当たった場合は、解析した式と一緒に記録しておいた解析後の読み取り位置と
+    current_token/peek_tokenを復元する。
+    primitive=Trueで登録した前置解析関数だけで終わる式はキャッシュに登録しない。
+    バックトラックする構文を追加したときに、パーサーを作り直さずにメモ化を有効にできるようにするためのもの。
+    enabledがFalseの場合は関数をそのまま返すので、呼び出しのコストは増えない。
+
+    Args:
+        enabled (bool): メモ化を有効にするかどうか
+
+    Returns:
+        Callable[[ParseExpressionMethod], ParseExpressionMethod]: parse_expressionに適用するデコレータ
+    """
+
+    def decorator(fn: ParseExpressionMethod) -> ParseExpressionMethod:
+        if not enabled:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(self: "Parser", priority: Priority) -> Expression | None:
+            # プリミティブな前置解析関数で始まり、後ろに中置演算子が続かない式は
+            # 1トークンで解析が終わり再帰しないので、キャッシュを引かずにそのまま解析する
+            if (
+                self.current_token.type in self.primitive_prefix_types
+                and self.peek_token.type not in self.infix_parse_functions
+            ):
+                return fn(self, priority)
+            tokenizer = self.tokenizer
+            key = (tokenizer.position, priority)
+            entry = self._memo.get(key)
+            if entry is None:
+                expression = fn(self, priority)
+                self._memo[key] = (
+                    expression,
+                    tokenizer.position,
+                    self.current_token,
+                    self.peek_token,
+                )
+                return expression
+            expression, tokenizer.position, self.current_token, self.peek_token = entry
+            return expression
+
+        return wrapper
+
+    return decorator
+
+
 class Parser:
+    __slots__ = (
+        "tokenizer",
+        "errors",
+        "current_token",
+        "peek_token",
+        "statement_parse_functions",
+        "prefix_parse_functions",
+        "infix_parse_functions",
+        "primitive_prefix_types",
+        "_memo",
+    )
+
     def __init__(self, tokenizer: Tokenizer) -> None:
         """
         Tokenizerがtokenizeした結果をもとにASTを生成するクラス
@@ -40,23 +134,37 @@ class Parser:
         次のトークン(peek_token)の両方を保持するため。
         これにより、パーサーは次に何が来るかを確認しながら現在のトークンを処理できる。これを先読みと呼ぶ。
 
+        current_token/peek_tokenは番兵のEOFトークンで初期化されるためNoneになることはない。
+        そのためparse_*メソッドはcurrent_tokenがNoneかどうかを確認しない。
+
         Args:
             tokenizer (Tokenizer): The tokenizer instance used to tokenize the input.
 
         Attributes:
-            current_token (Token | None): The current token being processed.
-            peek_token (Token | None): The next token to be processed.
+            current_token (Token): The current token being processed.
+            peek_token (Token): The next token to be processed.
             tokenizer (Tokenizer): The tokenizer instance used to tokenize the input.
         """
         self.tokenizer = tokenizer
         self.errors: list[str] = []
-        self.current_token: Token | None = None
-        self.peek_token: Token | None = None
-
-        self.prefix_parse_functions: dict[TokenType, PrefixParseFn] = {}
-        self.infix_parse_functions: dict[TokenType, InfixParseFn] = {}
-        self.register_prefix(TokenType.IDENT, self.parse_identifier)
-        self.register_prefix(TokenType.INT, self.parse_integer_literal)
+        # 番兵としてEOFトークンで初期化しておき、current_tokenとpeek_tokenがNoneにならないようにする
+        self.current_token: Token = EOF_TOKEN
+        self.peek_token: Token = EOF_TOKEN
+
+        # 文の種類ごとの解析関数. parse_statementの度に作り直さないように一度だけ生成する
+        # 登録されていないトークンで始まる文は式文として解析する
+        self.statement_parse_functions: dict[int, StatementParseFn] = {
+            TokenType.LET: self.parse_let_statement,
+            TokenType.RETURN: self.parse_return_statement,
+        }
+        self.prefix_parse_functions: dict[int, PrefixParseFn] = {}
+        self.infix_parse_functions: dict[int, InfixParseFn] = {}
+        # 1トークンだけを読み、parse_expressionを再帰的に呼ばない前置解析関数に対応するトークンの種類
+        self.primitive_prefix_types: set[int] = set()
+        # memoize_ifで有効にしたときに使う、parse_expressionの結果のキャッシュ
+        self._memo: dict[tuple[int, Priority], MemoEntry] = {}
+        self.register_prefix(TokenType.IDENT, self.parse_identifier, primitive=True)
+        self.register_prefix(TokenType.INT, self.parse_integer_literal, primitive=True)
         self.register_prefix(TokenType.BANG, self.parse_prefix_expression)
         self.register_prefix(TokenType.MINUS, self.parse_prefix_expression)
 
@@ -69,7 +177,7 @@ class Parser:
 
     def _init_tokens(self) -> None:
         """current_tokenとpeek_tokenを初期化する"""
-        # self.current_token = None, self.peek_token = 1つ目のトークン
+        # self.current_token = EOF(番兵), self.peek_token = 1つ目のトークン
         self.next_token()
         # self.current_token = 1つ目のトークン, self.peek_token = 2つ目のトークン
         self.next_token()
@@ -80,24 +188,11 @@ class Parser:
 
         Returns:
             Statement | None: 解析された文オブジェクト、または解析できなかった場合はNoneを返します。
-
-        Raises:
-            ValueError: current_tokenがNoneの場合に発生します。
         """
-        if self.current_token is None:
-            raise ValueError("current_token is None")
-
-        # _parse_functions = {
-        #     TokenType.LET: self.parse_let_statement,
-        #     TokenType.RETURN: self.parse_return_statement,
-        # }
-        match self.current_token.type:
-            case TokenType.LET:
-                return self.parse_let_statement()
-            case TokenType.RETURN:
-                return self.parse_return_statement()
-            case _:
-                return self.parse_expression_statement()
+        parse_function = self.statement_parse_functions.get(self.current_token.type)
+        if parse_function is None:
+            return self.parse_expression_statement()
+        return parse_function()
 
     def parse_let_statement(self) -> Statement | None:
         """
@@ -106,55 +201,57 @@ class Parser:
         Returns:
             Statement | None: 解析されたLetStatementオブジェクト、またはNone。
 
-        Raises:
-            ValueError: current_tokenがNoneの場合。
-
         処理の流れ:
-        1. current_tokenがNoneの場合、ValueErrorを発生させます。
-        2. LetStatementオブジェクトを作成し、current_tokenを設定します。
-        3. 次のトークンがIDENT型であることを確認し、そうでない場合はNoneを返します。
-        4. LetStatementオブジェクトのname属性にIdentifierオブジェクトを設定します。
-        5. 次のトークンがASSIGN型であることを確認し、そうでない場合はNoneを返します。
-        6. current_tokenがSEMICOLON型になるまでトークンを進めます。
-        7. 解析されたLetStatementオブジェクトを返します。
+        1. LetStatementオブジェクトを作成し、current_tokenを設定します。
+        2. 次のトークンがIDENT型であることを確認し、そうでない場合はNoneを返します。
+        3. LetStatementオブジェクトのname属性にIdentifierオブジェクトを設定します。
+        4. 次のトークンがASSIGN型であることを確認し、そうでない場合はNoneを返します。
+        5. current_tokenがSEMICOLON型になるまでトークンを進めます。
+        6. 解析されたLetStatementオブジェクトを返します。
         """
-        if self.current_token is None:
-            raise ValueError("current_token is None")
         stmt = LetStatement(token=self.current_token)
         if not self.expect_peek(TokenType.IDENT):
             return None
-        stmt.name = Identifier(
-            token=self.current_token, value=self.current_token.literal
-        )
+        token = self.current_token
+        stmt.name = Identifier(token=token, value=token.literal)
         if not self.expect_peek(TokenType.ASSIGN):
             return None
-        while self.current_token.type != TokenType.SEMICOLON:
-            self.next_token()
+        self._skip_to_end_of_statement()
         return stmt
 
     def parse_return_statement(self) -> Statement | None:
         """
         return文を解析してReturnStatementオブジェクトを生成します。
 
-        現在のトークンがNoneの場合、ValueErrorを発生させます。
         セミコロンに到達するまでトークンを進めます。
 
         Returns:
             Statement | None: 生成されたReturnStatementオブジェクト。
         """
-        if self.current_token is None:
-            raise ValueError("current_token is None")
         stmt = ReturnStatement(token=self.current_token)
-        while self.current_token.type != TokenType.SEMICOLON:
-            self.next_token()
+        self._skip_to_end_of_statement()
         return stmt
 
+    def _skip_to_end_of_statement(self) -> None:
+        """current_tokenがセミコロンになるまでトークンを進める
+
+        セミコロンがないまま入力が終わった場合はEOFで止まる。
+        ループ内でTokenTypeの属性を毎回引かないようにローカル変数に束縛しておく。
+        """
+        semicolon = TokenType.SEMICOLON
+        eof = TokenType.EOF
+        next_token = self.next_token
+        token_type = self.current_token.type
+        while token_type != semicolon and token_type != eof:
+            next_token()
+            token_type = self.current_token.type
+
+    @memoize_if(MEMOIZE_EXPRESSIONS)
     def parse_expression(self, priority: Priority) -> Expression | None:
-        if self.current_token is None:
-            raise ValueError("current_token is None")
-        prefix = self.prefix_parse_functions.get(self.current_token.type)
+        token = self.current_token
+        prefix = self.prefix_parse_functions.get(token.type)
         if prefix is None:
-            self.no_prefix_parser_error(self.current_token.type)
+            self.no_prefix_parser_error(token.type)
             return None
         left_expression = prefix()
         return left_expression
@@ -171,35 +268,25 @@ class Parser:
         return stmt
 
     def parse_identifier(self) -> Expression:
-        if self.current_token is None:
-            raise ValueError("current_token is None")
-        return Identifier(token=self.current_token, value=self.current_token.literal)
+        token = self.current_token
+        return Identifier(token=token, value=token.literal)
 
     def parse_integer_literal(self) -> Expression:
-        if self.current_token is None:
-            raise ValueError("current_token is None")
-        lit = IntegerLiteral(token=self.current_token)
+        token = self.current_token
+        lit = IntegerLiteral(token=token)
         try:
-            lit.value = int(self.current_token.literal)
+            lit.value = int(token.literal)
         except ValueError:
-            self.errors.append(
-                f"could not parse {self.current_token.literal} as integer"
-            )
+            self.errors.append(f"could not parse {token.literal} as integer")
         return lit
 
-    def current_token_is(self, token_type: TokenType) -> bool:
-        if self.peek_token is None:
-            raise ValueError("peek_token is None")
-        if self.current_token is None:
-            raise ValueError("current_token is None")
+    def current_token_is(self, token_type: int) -> bool:
         return self.current_token.type == token_type
 
-    def peek_token_is(self, token_type: TokenType) -> bool:
-        if self.peek_token is None:
-            raise ValueError("peek_token is None")
+    def peek_token_is(self, token_type: int) -> bool:
         return self.peek_token.type == token_type
 
-    def expect_peek(self, token_type: TokenType) -> bool:
+    def expect_peek(self, token_type: int) -> bool:
         if self.peek_token_is(token_type):
             self.next_token()
             return True
@@ -207,23 +294,18 @@ class Parser:
             self.peek_error(token_type)
             return False
 
-    def peek_error(self, token_type: TokenType) -> None:
-        if self.peek_token is None:
-            raise ValueError("peek_token is None")
-        self.errors.append(
-            f"expected next token to be {token_type}, got {self.peek_token.type} instead"
-        )
+    def peek_priority(self) -> Priority:
+        """peek_tokenの中置演算子としての優先順位を返す"""
+        return _PRIORITIES[self.peek_token.type]
 
-    def _is_end_of_statement(self) -> bool:
-        """
-        現在のトークンが文の終わりでないことを確認する
+    def current_priority(self) -> Priority:
+        """current_tokenの中置演算子としての優先順位を返す"""
+        return _PRIORITIES[self.current_token.type]
 
-        Returns:
-            bool: 現在のトークンがNoneでなく、かつトークンのタイプがセミコロンでない場合にTrueを返します。
-        """
-        return (
-            # 現在のトークンがNone、またはEOFトークンの場合はEOFに達していると判断する
-            self.current_token is None or self.current_token.type == TokenType.EOF
+    def peek_error(self, token_type: int) -> None:
+        self.errors.append(
+            f"expected next token to be {TOKEN_LITERAL[token_type]}, "
+            f"got {TOKEN_LITERAL[self.peek_token.type]} instead"
         )
 
     def parse_program(self) -> Program:
@@ -232,26 +314,48 @@ class Parser:
         2. ループを使って、EOFトークンに達するまでトークンを読み込む
         """
         program = Program()
-        while not self._is_end_of_statement():
-            stmt = self.parse_statement()
+        # 解析し直したときに前回の結果を使わないよう、キャッシュは解析の開始時に捨てる
+        self._memo.clear()
+        # ループ内でTokenTypeやメソッドの属性を毎回引かないようにローカル変数に束縛しておく
+        eof = TokenType.EOF
+        parse_statement = self.parse_statement
+        next_token = self.next_token
+        append = program.statements.append
+        while self.current_token.type != eof:
+            stmt = parse_statement()
             if stmt:
-                program.statements.append(stmt)
-            self.next_token()
+                append(stmt)
+            next_token()
         return program
 
-    def register_prefix(self, token_type: TokenType, fn: PrefixParseFn) -> None:
+    def register_prefix(
+        self, token_type: int, fn: PrefixParseFn, primitive: bool = False
+    ) -> None:
+        """token_typeのトークンで始まる式の前置解析関数を登録する
+
+        Args:
+            token_type (int): 前置解析関数を対応させるトークンの種類
+            fn (PrefixParseFn): 前置解析関数
+            primitive (bool): fnが1トークンだけを読み、parse_expressionを再帰的に呼ばないかどうか.
+                Trueの場合、memoize_ifによるキャッシュの対象から外す
+        """
         self.prefix_parse_functions[token_type] = fn
+        if primitive:
+            self.primitive_prefix_types.add(token_type)
+        else:
+            self.primitive_prefix_types.discard(token_type)
 
-    def register_infix(self, token_type: TokenType, fn: InfixParseFn) -> None:
+    def register_infix(self, token_type: int, fn: InfixParseFn) -> None:
         self.infix_parse_functions[token_type] = fn
 
-    def no_prefix_parser_error(self, token_type: TokenType) -> None:
-        self.errors.append(f"no prefix parse function for {token_type} found")
+    def no_prefix_parser_error(self, token_type: int) -> None:
+        self.errors.append(
+            f"no prefix parse function for {TOKEN_LITERAL[token_type]} found"
+        )
 
     def parse_prefix_expression(self) -> Expression:
-        expression = PrefixExpression(
-            token=self.current_token, operator=self.current_token.literal
-        )
+        token = self.current_token
+        expression = PrefixExpression(token=token, operator=token.literal)
         self.next_token()
         # 本文中のPREFIXはどこで定義されている？
         expression.right = self.parse_expression(Priority.PREFIX)
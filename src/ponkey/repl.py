@@ -1,23 +1,53 @@
+import sys
+
 from rich import pretty
 
-from ponkey.token import TokenType
+from ponkey.ast import Program
+from ponkey.parser import Parser
+from ponkey.token import EOF_TOKEN
 from ponkey.tokenizer import Tokenizer
 
 
 class REPL:
     PREFIX: str = "ponkey>> "
-    pretty.install()
-
-    def __init__(self) -> None:
-        pass
 
     def start(self) -> None:
+        # パイプやファイルから入力された場合は、1行ずつ処理せずに入力全体をまとめて解析する
+        if not sys.stdin.isatty():
+            self.run_stream(sys.stdin.read())
+            return
+        # モジュールのimport時やREPLの生成時ではなく、対話的に使うときにだけ表示フックを差し替える
+        pretty.install()
+        # 入力ごとにTokenizerを作らず、1つのインスタンスをresetして使い回す
+        tokenizer = Tokenizer("")
         while True:
             print(self.PREFIX, end="")
-            line = input()
-            tokenizer = Tokenizer(line)
-            while True:
-                token = tokenizer.next_token()
-                if token.type == TokenType.EOF:
-                    break
-                print(token)
+            tokenizer.reset(input())
+            self._print_tokens(tokenizer)
+
+    def run_stream(self, src: str) -> Program:
+        """入力全体を1つのTokenizerとParserで解析する
+
+        行ごとにTokenizerとParserを作り直さないので、まとめて入力されたプログラムを速く解析できる。
+        出力は対話的に入力したときと同じく、入力全体のトークンを1行に1つずつ出力する。
+        sys.displayhookは差し替えないので、テストなどからそのまま呼び出せる。
+
+        Args:
+            src (str): 解析するプログラム全体
+
+        Returns:
+            Program: 解析したプログラム
+        """
+        tokenizer = Tokenizer(src)
+        self._print_tokens(tokenizer)
+        # 出力のために読み進めたトークンを先頭に戻し、同じトークンのリストをParserに渡す
+        tokenizer.position = 0
+        return Parser(tokenizer).parse_program()
+
+    @staticmethod
+    def _print_tokens(tokenizer: Tokenizer) -> None:
+        """tokenizerの残りのトークンを1行に1つずつ出力する"""
+        tokens = list(iter(tokenizer.next_token, EOF_TOKEN))
+        # トークンごとにprintを呼ばず、まとめて1回で書き出す
+        if tokens:
+            print("\n".join(map(repr, tokens)))
@@ -1,71 +1,103 @@
-from dataclasses import dataclass
-from enum import StrEnum
+from typing import NamedTuple
 
 
-class TokenType(StrEnum):
-    """トークンの種類を表す列挙型.予約語も含まれる."""
+class TokenType:
+    """トークンの種類を表す定数の名前空間.予約語も含まれる.
 
-    ASSIGN = "="
-
-    PLUS = "+"
-    MINUS = "-"
-    BANG = "!"
-    ASTERISK = "*"
-    SLASH = "/"
-    LT = "<"
-    GT = ">"
-    EQ = "=="
-    NEQ = "!="
-
-    FUNCTION = "func"
-    LET = "let"
-    TRUE = "true"
-    FALSE = "false"
-    IF = "if"
-    ELSE = "else"
-    RETURN = "return"
-
-    INT = "INT"
-    LPAREN = "("
-    RPAREN = ")"
-    LBRACE = "{"
-    RBRACE = "}"
-
-    SEMICOLON = ";"
-    COMMA = ","
-
-    IDENT = "IDENT"
-    EOF = ""
+    値はただのintの定数として持ち、トークンの種類はintとして扱う.
+    Enumのメンバーはクラス属性として引くだけでもEnumTypeを経由するため、比較や辞書のキーに使うと
+    ただの定数より遅い. またintにしておくと、トークンの種類を添字にした表を作れる.
+    エラーメッセージなどに表示するときはTOKEN_LITERALで文字列に変換する.
+    """
 
-    ILLEGAL = "ILLEGAL"
+    ASSIGN = 1
+
+    PLUS = 2
+    MINUS = 3
+    BANG = 4
+    ASTERISK = 5
+    SLASH = 6
+    LT = 7
+    GT = 8
+    EQ = 9
+    NEQ = 10
+
+    FUNCTION = 11
+    LET = 12
+    TRUE = 13
+    FALSE = 14
+    IF = 15
+    ELSE = 16
+    RETURN = 17
+
+    INT = 18
+    LPAREN = 19
+    RPAREN = 20
+    LBRACE = 21
+    RBRACE = 22
+
+    SEMICOLON = 23
+    COMMA = 24
+
+    IDENT = 25
+    EOF = 26
+
+    ILLEGAL = 27
+
+
+# トークンの種類の表示用の文字列
+TOKEN_LITERAL: dict[int, str] = {
+    TokenType.ASSIGN: "=",
+    TokenType.PLUS: "+",
+    TokenType.MINUS: "-",
+    TokenType.BANG: "!",
+    TokenType.ASTERISK: "*",
+    TokenType.SLASH: "/",
+    TokenType.LT: "<",
+    TokenType.GT: ">",
+    TokenType.EQ: "==",
+    TokenType.NEQ: "!=",
+    TokenType.FUNCTION: "func",
+    TokenType.LET: "let",
+    TokenType.TRUE: "true",
+    TokenType.FALSE: "false",
+    TokenType.IF: "if",
+    TokenType.ELSE: "else",
+    TokenType.RETURN: "return",
+    TokenType.INT: "INT",
+    TokenType.LPAREN: "(",
+    TokenType.RPAREN: ")",
+    TokenType.LBRACE: "{",
+    TokenType.RBRACE: "}",
+    TokenType.SEMICOLON: ";",
+    TokenType.COMMA: ",",
+    TokenType.IDENT: "IDENT",
+    TokenType.EOF: "",
+    TokenType.ILLEGAL: "ILLEGAL",
+}
 
 
-@dataclass
-class Token:
+class Token(NamedTuple):
     """
     トークンは、字句解析器によって生成されたトークンを表す。
     トークンは、トークンの種類とそのリテラル値を持つ。
 
+    NamedTupleなのでインスタンスは__dict__を持たずイミュータブルであり、
+    固定のリテラルを持つトークンは字句解析器の中で1つのインスタンスを共有できる。
+
     Attributes:
-        type (TokenType): トークンの種類
+        type (int): トークンの種類(TokenTypeの定数)
         literal (str): トークンのリテラル値
     """
 
-    type: TokenType
+    type: int
     literal: str
 
     def __repr__(self) -> str:
-        return f"Token ( type: {self.type}, literal: {self.literal} )"
-
-    @staticmethod
-    def lookup_table(literal: str) -> "TokenType":
-        """リテラルが予約語だったら対応するトークンを返し、
-        そうでなければユーザー定義のトークンと判断しIDENTを返す.
-        """
-        return PreservedKeywords.get(literal, TokenType.IDENT)
+        return f"Token ( type: {TOKEN_LITERAL[self.type]}, literal: {self.literal} )"
 
 
-PreservedKeywords = {
+PreservedKeywords: dict[str, int] = {
     "func": TokenType.FUNCTION,
     "let": TokenType.LET,
     "true": TokenType.TRUE,
@@ -74,3 +106,53 @@ PreservedKeywords = {
     "else": TokenType.ELSE,
     "return": TokenType.RETURN,
 }
+
+# 固定のリテラルを持つトークンの共有インスタンス.
+# Tokenはイミュータブルなので、字句解析器はトークンを生成する代わりにこれらを返す.
+EOF_TOKEN = Token(TokenType.EOF, "")
+ASSIGN_TOKEN = Token(TokenType.ASSIGN, "=")
+PLUS_TOKEN = Token(TokenType.PLUS, "+")
+MINUS_TOKEN = Token(TokenType.MINUS, "-")
+BANG_TOKEN = Token(TokenType.BANG, "!")
+ASTERISK_TOKEN = Token(TokenType.ASTERISK, "*")
+SLASH_TOKEN = Token(TokenType.SLASH, "/")
+LT_TOKEN = Token(TokenType.LT, "<")
+GT_TOKEN = Token(TokenType.GT, ">")
+EQ_TOKEN = Token(TokenType.EQ, "==")
+NEQ_TOKEN = Token(TokenType.NEQ, "!=")
+LPAREN_TOKEN = Token(TokenType.LPAREN, "(")
+RPAREN_TOKEN = Token(TokenType.RPAREN, ")")
+LBRACE_TOKEN = Token(TokenType.LBRACE, "{")
+RBRACE_TOKEN = Token(TokenType.RBRACE, "}")
+COMMA_TOKEN = Token(TokenType.COMMA, ",")
+SEMICOLON_TOKEN = Token(TokenType.SEMICOLON, ";")
+
+# リテラルから共有インスタンスを引くためのテーブル
+SINGLE_CHAR_TOKENS: dict[str, Token] = {
+    tok.literal: tok
+    for tok in [
+        ASSIGN_TOKEN,
+        PLUS_TOKEN,
+        MINUS_TOKEN,
+        BANG_TOKEN,
+        ASTERISK_TOKEN,
+        SLASH_TOKEN,
+        LT_TOKEN,
+        GT_TOKEN,
+        LPAREN_TOKEN,
+        RPAREN_TOKEN,
+        LBRACE_TOKEN,
+        RBRACE_TOKEN,
+        COMMA_TOKEN,
+        SEMICOLON_TOKEN,
+    ]
+}
+TWO_CHAR_TOKENS: dict[str, Token] = {
+    EQ_TOKEN.literal: EQ_TOKEN,
+    NEQ_TOKEN.literal: NEQ_TOKEN,
+}
+# 予約語は固定のリテラルを持つので、リテラルから共有インスタンスを引く
+KEYWORD_TOKENS: dict[str, Token] = {
+    literal: Token(token_type, literal)
+    for literal, token_type in PreservedKeywords.items()
+}
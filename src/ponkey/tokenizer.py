@@ -2,172 +2,145 @@
 字句解析器(Lexer, Tokenizer)の実装
 """
 
-from dataclasses import dataclass, field
-from typing import ClassVar
+import re
+
+from ponkey.token import (
+    EOF_TOKEN,
+    KEYWORD_TOKENS,
+    SINGLE_CHAR_TOKENS,
+    TWO_CHAR_TOKENS,
+    Token,
+    TokenType,
+)
+
+# 固定のリテラルを持つトークン. リテラルから共有のインスタンスを引く
+_FIXED_TOKENS: dict[str, Token] = {**TWO_CHAR_TOKENS, **SINGLE_CHAR_TOKENS}
+
+# 全てのトークンのパターンを1つの正規表現にまとめたもの
+# 演算子と区切り文字は1つのグループにまとめ、トークンの種類は一致したリテラルから_FIXED_TOKENSで引く.
+# こうすると正規表現エンジンは先頭の1文字を文字クラスで判定するだけで済み、
+# 演算子ごとの選択肢を順に試す必要がなくなる
+# トークンの前の空白は同じマッチの中で読み飛ばすので、空白だけのマッチがPython側のループに返ることはない
+# どのパターンにも一致しない文字はILLEGALとして1文字ずつ切り出す
+_TOKEN_RE = re.compile(
+    r"""
+    [ \t\n\r]*
+    (?:
+        (?P<IDENT>[A-Za-z_]+)
+        |(?P<INT>[0-9]+)
+        |(?P<FIXED>[=!]=?|[+\-*/<>(){},;])
+        |(?P<ILLEGAL>[^ \t\n\r])
+    )
+    """,
+    re.VERBOSE,
+)
 
-from ponkey.token import Token, TokenType
 
-
-@dataclass
 class Tokenizer:
     """Ponkey言語の字句解析器.
 
     文字列をトークンに分割する.
+    生成時に_TOKEN_REで入力全体を1度だけ走査してトークンのリストを作り、
+    next_tokenはそのリストを先頭から順に返す.
 
     Attributes:
         input (str): 字句解析器が解析する文字列
-        position (int): 現在の文字の位置
-        read_position (int): 次の文字の位置
-        ch (str): 現在の文字
     """
 
-    input: str
-    position: int = 0
-    read_position: int = 0
-    ch: str | None = field(init=False)
+    __slots__ = ("input", "_tokens", "_index")
 
-    WHITESPACES: ClassVar[list[str]] = [" ", "\t", "\n", "\r"]
+    def __init__(self, input: str) -> None:
+        self.reset(input)
 
-    def __post_init__(self) -> None:
-        self.read_char()
+    def reset(self, input: str) -> None:
+        """解析する文字列を入れ替えて、先頭から読み直す
 
-    def peek_char(self) -> str | None:
-        if self.read_position >= len(self.input):
-            return None
-        else:
-            return self.input[self.read_position]
+        REPLのように入力ごとにTokenizerを作り直さずに、同じインスタンスを使い回すために使う。
 
-    def read_char(self) -> None:
+        Args:
+            input (str): 新しく解析する文字列
         """
-        現在の読み取り位置から1文字を読み込み、`self.ch`に設定します。
-        読み取り位置が入力の長さを超えている場合、`self.ch`は空文字列になります。
-        その後、`self.position`を現在の読み取り位置に更新し、`self.read_position`を1つ進めます。
+        self.input = input
+        self._tokens = self.tokenize_all()
+        self._index = 0
+
+    def tokenize_all(self) -> list[Token]:
+        """入力全体をトークンのリストに変換する. 空白は読み飛ばし、EOFトークンは含まない
 
         Returns:
-            None
+            list[Token]: 入力の先頭から順に並べたトークンのリスト
         """
-        if self.read_position >= len(self.input):
-            self.ch = None
-        else:
-            self.ch = self.input[self.read_position]
-        self.position = self.read_position
-        self.read_position = self.position + 1
-
-    def read_number(self) -> str:
-        """Read until the next non-number character"""
-        start_position = self.position
-        while self._is_number(self.ch):
-            self.read_char()
-        return self.input[start_position : self.position]
-
-    def read_identifier(self) -> str:
-        """Read until the next non-letter character"""
-        start_position = self.position
-        while self._is_letter(self.ch):
-            self.read_char()
-        return self.input[start_position : self.position]
-
-    def next_token(self) -> Token:
-        """次のトークンを返す
-
-        手順:
-            1. 空白をスキップ
-            2. 現在の文字が特定の文字の場合、その文字に対応するトークンを返す
-            3. 現在の文字が英字の場合、識別子を読み取り、その識別子に対応するトークンを返す
-            4. 現在の文字が数字の場合、数字を読み取り、その数字に対応するトークンを返す
-            5. それ以外の場合、ILLEGALトークンを返す
+        tokens: list[Token] = []
+        # ループ内でグローバル変数や属性を毎回引かないようにローカル変数に束縛しておく
+        append = tokens.append
+        ident = TokenType.IDENT
+        fixed_tokens = _FIXED_TOKENS
+        # 同じリテラルの識別子・整数は等しいTokenになるので、1回の走査の中でインスタンスを共有する.
+        # 予約語の共有インスタンスもこの辞書に入れておき、識別子ごとの辞書の参照を1回で済ませる
+        named_tokens = dict(KEYWORD_TOKENS)
+        named_tokens_get = named_tokens.get
+        integer_tokens: dict[str, Token] = {}
+        integer_tokens_get = integer_tokens.get
+        # findallはマッチごとにMatchオブジェクトを作らず、各グループの文字列のタプルを返す.
+        # 一致しなかったグループは空文字列になる
+        for name, integer, fixed, illegal in _TOKEN_RE.findall(self.input):
+            if name:
+                tok = named_tokens_get(name)
+                if tok is None:
+                    tok = named_tokens[name] = Token(ident, name)
+                append(tok)
+            elif fixed:
+                append(fixed_tokens[fixed])
+            elif integer:
+                tok = integer_tokens_get(integer)
+                if tok is None:
+                    tok = integer_tokens[integer] = Token(TokenType.INT, integer)
+                append(tok)
+            else:
+                append(Token(TokenType.ILLEGAL, illegal))
+        return tokens
+
+    @property
+    def position(self) -> int:
+        """次のnext_tokenが返すトークンの、トークンのリスト上の位置
+
+        入力の終わりを越えてもnext_tokenを呼ぶたびに増えるので、トークンのリストの長さより大きくなることがある.
         """
-        # 空白をスキップ
-        self._skip_whitespace()
-        # 現在の文字が特定の文字の場合、その文字に対応するトークンを返す
-        match self.ch:
-            case "=":
-                # 次の文字をpeekして、== か = かを判定する
-                if self.peek_char() == "=":
-                    # 次の文字が = の場合、== としてトークンを生成する
-                    ch: str = self.ch
-                    # 次の文字に進める
-                    self.read_char()
-                    literal = ch + self.ch
-                    tok = Token(TokenType.EQ, literal)
-                else:
-                    # 次の文字が = でない場合、= としてトークンを生成する
-                    tok = Token(TokenType.ASSIGN, "=")
-            case "+":
-                tok = Token(TokenType.PLUS, "+")
-            case "-":
-                tok = Token(TokenType.MINUS, "-")
-            case "!":
-                # 次の文字をpeekして、!= か ! かを判定する
-                if self.peek_char() == "=":
-                    # 次の文字が = の場合、!= としてトークンを生成する
-                    ch: str = self.ch  # type: ignore[no-redef]
-                    self.read_char()
-                    literal = ch + self.ch
-                    tok = Token(TokenType.NEQ, literal)
-                else:
-                    tok = Token(TokenType.BANG, "!")
-            case "*":
-                tok = Token(TokenType.ASTERISK, "*")
-            case "/":
-                tok = Token(TokenType.SLASH, "/")
-            case "<":
-                tok = Token(TokenType.LT, "<")
-            case ">":
-                tok = Token(TokenType.GT, ">")
-            case "(":
-                tok = Token(TokenType.LPAREN, "(")
-            case ")":
-                tok = Token(TokenType.RPAREN, ")")
-            case "{":
-                tok = Token(TokenType.LBRACE, "{")
-            case "}":
-                tok = Token(TokenType.RBRACE, "}")
-            case ",":
-                tok = Token(TokenType.COMMA, ",")
-            case ";":
-                tok = Token(TokenType.SEMICOLON, ";")
-            case None:
-                tok = Token(TokenType.EOF, "")
-            # 現在の文字が英字の場合、識別子を読み取り、その識別子に対応するトークンを返す
-            case _:
-                # 英字の場合、識別子を読み取る
-                if self._is_letter(self.ch):
-                    literal = self.read_identifier()
-                    # 識別子トークンまたは予約語トークンを返す
-                    tok = Token(
-                        Token.lookup_table(literal),
-                        literal,
-                    )
-                    return tok
-                elif self._is_number(self.ch):
-                    literal = self.read_number()
-                    tok = Token(TokenType.INT, literal)
-                    return tok
-                else:
-                    tok = Token(TokenType.ILLEGAL, self.ch)
-        self.read_char()
-        return tok
-
-    @staticmethod
-    def _is_letter(ch: str | None) -> bool:
-        """文字が英字かアンダースコアかどうかを判定する
+        return self._index
+
+    @position.setter
+    def position(self, position: int) -> None:
+        self._index = position
+
+    def peek(self, k: int = 1) -> Token:
+        """読み取り位置を進めずに、k番目に返されるトークンを返す
+
+        peek(1)は次のnext_tokenが返すトークンと同じになる.
+        トークンのリストは生成時に作られているので、任意の先読みができる.
 
         Args:
-            ch (str): 判定したい文字
+            k (int): 何番目のトークンを見るか. 1以上
+
+        Returns:
+            Token: k番目のトークン. 入力の終わりを越える場合はEOFトークン
+
+        Raises:
+            ValueError: kが1未満の場合
+        """
+        if k < 1:
+            raise ValueError(f"k must be 1 or more, got {k}")
+        index = self._index + k - 1
+        if index < len(self._tokens):
+            return self._tokens[index]
+        return EOF_TOKEN
+
+    def next_token(self) -> Token:
+        """次のトークンを返す. 全てのトークンを返した後はEOFトークンを返し続ける
+
+        EOFトークンを返すときも読み取り位置は進めるので、next_tokenを呼んだ回数ごとにpositionは異なる値になる.
         """
-        if ch is None:
-            raise ValueError("ch is None")
-        return ("a" <= ch <= "z") | ("A" <= ch <= "Z") | (ch == "_")
-
-    @staticmethod
-    def _is_number(ch: str | None) -> bool:
-        if ch is None:
-            raise ValueError("ch is None")
-        """chが数字かどうかを判定する"""
-        return "0" <= ch <= "9"
-
-    def _skip_whitespace(self) -> None:
-        """Tokenizer.WHITESPACESに定義された空文字をスキップする"""
-        while self.ch in self.WHITESPACES:
-            self.read_char()
+        index = self._index
+        self._index = index + 1
+        if index < len(self._tokens):
+            return self._tokens[index]
+        return EOF_TOKEN
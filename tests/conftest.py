@@ -0,0 +1,87 @@
+import pytest
+
+from ponkey.ast import Program
+from ponkey.parser import Parser
+from ponkey.token import TokenType
+from ponkey.tokenizer import Tokenizer
+
+LET_INPUT = """
+let x = 5;
+let y = 10;
+let foobar = 838838;
+"""
+RETURN_INPUT = """
+return 5;
+return 10;
+return 838838;
+"""
+IDENTIFIER_INPUT = "foobar;"
+INTEGER_INPUT = "5;"
+# 入力ごとに解析せず、全ての入力を連結して1度だけ解析する
+BATCHED_INPUTS = [LET_INPUT, RETURN_INPUT, IDENTIFIER_INPUT, INTEGER_INPUT]
+BATCHED_INPUT = "\n".join(BATCHED_INPUTS)
+
+# 1つの入力を解析した結果. その入力の解析中に記録されたエラーと、その入力の文を持つProgram
+ParsedInput = tuple[list[str], Program]
+
+
+def parse_batched(inputs: list[str]) -> list[ParsedInput]:
+    """inputsを連結して1つのTokenizerとParserで解析し、入力ごとの結果に分ける
+
+    各入力のトークン数から入力の境目を求め、current_tokenが境目を越えるたびに
+    それまでの文とエラーをその入力の結果とする。
+    入力の途中で文が終わらないと次の入力の文がずれ込むが、その場合も文の数やエラーは
+    ずれ込んだ入力のテストで検出できる。
+
+    Args:
+        inputs (list[str]): 連結して解析する入力のリスト
+
+    Returns:
+        list[ParsedInput]: inputsと同じ順に並べた、入力ごとの解析結果
+    """
+    tokenizer = Tokenizer("\n".join(inputs))
+    parser = Parser(tokenizer)
+    eof = TokenType.EOF
+    results: list[ParsedInput] = []
+    end = 0
+    for input_ in inputs:
+        end += len(Tokenizer(input_).tokenize_all())
+        errors_start = len(parser.errors)
+        program = Program()
+        # Parserはcurrent_tokenとpeek_tokenを読み込み済みなので、
+        # current_tokenの位置はtokenizer.positionより2つ前になる
+        while tokenizer.position - 2 < end and parser.current_token.type != eof:
+            stmt = parser.parse_statement()
+            if stmt:
+                program.statements.append(stmt)
+            parser.next_token()
+        results.append((parser.errors[errors_start:], program))
+    assert parser.current_token.type == eof, "batched input was not fully parsed"
+    return results
+
+
+# 以下のfixtureはテストの間で同じ入力を何度も解析しないよう、セッションごとに1度だけ解析する
+# 返したエラーのリストとProgramはテストの中で書き換えないこと
+@pytest.fixture(scope="session")
+def parsed_inputs() -> list[ParsedInput]:
+    return parse_batched(BATCHED_INPUTS)
+
+
+@pytest.fixture(scope="session")
+def parsed_let_program(parsed_inputs: list[ParsedInput]) -> ParsedInput:
+    return parsed_inputs[BATCHED_INPUTS.index(LET_INPUT)]
+
+
+@pytest.fixture(scope="session")
+def parsed_return_program(parsed_inputs: list[ParsedInput]) -> ParsedInput:
+    return parsed_inputs[BATCHED_INPUTS.index(RETURN_INPUT)]
+
+
+@pytest.fixture(scope="session")
+def parsed_identifier_program(parsed_inputs: list[ParsedInput]) -> ParsedInput:
+    return parsed_inputs[BATCHED_INPUTS.index(IDENTIFIER_INPUT)]
+
+
+@pytest.fixture(scope="session")
+def parsed_integer_program(parsed_inputs: list[ParsedInput]) -> ParsedInput:
+    return parsed_inputs[BATCHED_INPUTS.index(INTEGER_INPUT)]
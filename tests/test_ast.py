@@ -1,4 +1,4 @@
-from ponkey.ast import Identifier, LetStatement, Program
+from ponkey.ast import Identifier, LetStatement, Program, ReturnStatement
 from ponkey.token import Token, TokenType
 
 
@@ -13,3 +13,9 @@ class TestString:
         ]
         program = Program(statements=statements)
         assert program.string() == "let myVar = anotherVar;"
+
+    def test_return_statement_string(self) -> None:
+        statement = ReturnStatement(Token(TokenType.RETURN, "return"))
+        statement.return_value = Identifier(Token(TokenType.IDENT, "x"), "x")
+        program = Program(statements=[statement])
+        assert program.string() == "return x;"
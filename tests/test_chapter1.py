@@ -1,4 +1,12 @@
-from ponkey.token import Token, TokenType
+import pytest
+
+from ponkey.token import (
+    EOF_TOKEN,
+    KEYWORD_TOKENS,
+    SINGLE_CHAR_TOKENS,
+    Token,
+    TokenType,
+)
 from ponkey.tokenizer import Tokenizer
 
 
@@ -19,9 +27,6 @@ class TestTokenizerInit:
 
         tokenizer = Tokenizer(input=input)
         assert tokenizer.input == input
-        assert tokenizer.position == 0
-        assert tokenizer.read_position == 1
-        assert tokenizer.ch == "="
         for i, expected_result in enumerate(expected_results):
             tok = tokenizer.next_token()
             assert tok == expected_result
@@ -188,3 +193,123 @@ class TestTokenizerInit:
         for expected_result in expected_results:
             tok = tokenizer.next_token()
             assert tok == expected_result
+
+    def test_whitespace_runs(self) -> None:
+        input = " \t\r\n  let\t\tx \r\n=\n\n 5 ;  \n\t"
+        expected_results = [
+            Token(TokenType.LET, "let"),
+            Token(TokenType.IDENT, "x"),
+            Token(TokenType.ASSIGN, "="),
+            Token(TokenType.INT, "5"),
+            Token(TokenType.SEMICOLON, ";"),
+            Token(TokenType.EOF, ""),
+        ]
+        tokenizer = Tokenizer(input=input)
+        for expected_result in expected_results:
+            tok = tokenizer.next_token()
+            assert tok == expected_result
+
+    def test_identifier_and_number_at_end_of_input(self) -> None:
+        expected_results = [
+            Token(TokenType.IDENT, "foo_bar"),
+            Token(TokenType.INT, "123"),
+            Token(TokenType.EOF, ""),
+        ]
+        for input in ["foo_bar 123", "foo_bar\t123"]:
+            tokenizer = Tokenizer(input=input)
+            for expected_result in expected_results:
+                tok = tokenizer.next_token()
+                assert tok == expected_result
+
+    def test_illegal_characters(self) -> None:
+        input = "let é = 5 @;"
+        expected_results = [
+            Token(TokenType.LET, "let"),
+            Token(TokenType.ILLEGAL, "é"),
+            Token(TokenType.ASSIGN, "="),
+            Token(TokenType.INT, "5"),
+            Token(TokenType.ILLEGAL, "@"),
+            Token(TokenType.SEMICOLON, ";"),
+            Token(TokenType.EOF, ""),
+        ]
+        tokenizer = Tokenizer(input=input)
+        for expected_result in expected_results:
+            tok = tokenizer.next_token()
+            assert tok == expected_result
+
+    def test_tokenize_all(self) -> None:
+        input = "let x = 5 == !y;"
+        expected_results = [
+            Token(TokenType.LET, "let"),
+            Token(TokenType.IDENT, "x"),
+            Token(TokenType.ASSIGN, "="),
+            Token(TokenType.INT, "5"),
+            Token(TokenType.EQ, "=="),
+            Token(TokenType.BANG, "!"),
+            Token(TokenType.IDENT, "y"),
+            Token(TokenType.SEMICOLON, ";"),
+        ]
+        tokenizer = Tokenizer(input=input)
+        assert tokenizer.tokenize_all() == expected_results
+        for _ in range(2):
+            tokenizer.next_token()
+        # tokenize_allはnext_tokenの読み取り位置に影響しない
+        assert tokenizer.next_token() == Token(TokenType.ASSIGN, "=")
+
+    def test_fixed_literal_tokens_are_shared(self) -> None:
+        tokenizer = Tokenizer(input="; ; let let")
+        first = tokenizer.next_token()
+        second = tokenizer.next_token()
+        assert first is second is SINGLE_CHAR_TOKENS[";"]
+        first = tokenizer.next_token()
+        second = tokenizer.next_token()
+        assert first is second is KEYWORD_TOKENS["let"]
+        assert tokenizer.next_token() is EOF_TOKEN
+
+    def test_reset(self) -> None:
+        tokenizer = Tokenizer(input="let x = 5;")
+        tokenizer.next_token()
+        tokenizer.reset("return y;")
+        assert tokenizer.input == "return y;"
+        expected_results = [
+            Token(TokenType.RETURN, "return"),
+            Token(TokenType.IDENT, "y"),
+            Token(TokenType.SEMICOLON, ";"),
+            Token(TokenType.EOF, ""),
+        ]
+        for expected_result in expected_results:
+            tok = tokenizer.next_token()
+            assert tok == expected_result
+
+    def test_position_advances_past_eof(self) -> None:
+        tokenizer = Tokenizer(input="x")
+        positions: list[int] = []
+        for _ in range(3):
+            tokenizer.next_token()
+            positions.append(tokenizer.position)
+        # EOFトークンを返し続けるときも位置は進み、同じ位置が2回現れない
+        assert positions == [1, 2, 3]
+        assert tokenizer.peek() == EOF_TOKEN
+
+    def test_peek(self) -> None:
+        tokenizer = Tokenizer(input="let x;")
+        assert tokenizer.peek() == Token(TokenType.LET, "let")
+        assert tokenizer.peek(3) == Token(TokenType.SEMICOLON, ";")
+        assert tokenizer.peek(4) == Token(TokenType.EOF, "")
+        # peekは読み取り位置を進めない
+        assert tokenizer.next_token() == Token(TokenType.LET, "let")
+        assert tokenizer.peek() == Token(TokenType.IDENT, "x")
+        assert tokenizer.next_token() == Token(TokenType.IDENT, "x")
+
+    def test_peek_rejects_k_below_one(self) -> None:
+        tokenizer = Tokenizer(input="let x;")
+        for k in [0, -1]:
+            with pytest.raises(ValueError):
+                tokenizer.peek(k)
+
+    def test_repeated_identifiers_and_integers_are_shared(self) -> None:
+        tokens = Tokenizer(input="x + 10 + x + 10").tokenize_all()
+        assert tokens[0] is tokens[4]
+        assert tokens[2] is tokens[6]
+        assert tokens[0] == Token(TokenType.IDENT, "x")
+        assert tokens[2] == Token(TokenType.INT, "10")
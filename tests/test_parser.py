@@ -1,23 +1,29 @@
-from pytest import CaptureFixture
-
-from ponkey.ast import Expression, ExpressionStatement, LetStatement, PrefixExpression
-from ponkey.parser import Parser
+import pytest
+
+from ponkey.ast import (
+    ExpressionStatement,
+    IntegerLiteral,
+    LetStatement,
+    PrefixExpression,
+    Program,
+    ReturnStatement,
+)
+from ponkey.parser import Parser, Priority, memoize_if
 from ponkey.token import TokenType
 from ponkey.tokenizer import Tokenizer
 
+# 文の先頭のトークンの種類. ヘルパーで比較するたびにTokenTypeの属性を引かないように束縛しておく
+_LET = TokenType.LET
+_RETURN = TokenType.RETURN
+
 
 def check_parser_errors(parser: Parser) -> None:
-    errors = parser.errors
-    if not errors:
-        return
-    print("parser has {} errors".format(len(errors)))
-    for error in errors:
-        print("parser error: {}".format(error))
+    assert parser.errors == []
 
 
 class TestLetStatements:
     def _test_let_statement(self, statement: LetStatement, name: str) -> bool:
-        if statement.token_literal() != TokenType.LET:
+        if statement.token.type != _LET:
             return False
         if statement.name.value != name:
             return False
@@ -25,115 +31,212 @@ class TestLetStatements:
             return False
         return True
 
-    def test_statements(self) -> None:
-        input_ = """
-        let x = 5;
-        let y = 10;
-        let foobar = 838838;
-        """
-        expected_identifiers = ["x", "y", "foobar"]
-
-        tokenizer = Tokenizer(input_)
-        parser = Parser(tokenizer)
-        program = parser.parse_program()
-        check_parser_errors(parser)
-        for i, expected_identifier in enumerate(expected_identifiers):
-            self._test_let_statement(program.statements[i], expected_identifier)
-
-    def test_error_messages(self, capsys: CaptureFixture[str]) -> None:
+    @pytest.mark.parametrize(
+        "index,expected_identifier", [(0, "x"), (1, "y"), (2, "foobar")]
+    )
+    def test_statements(
+        self,
+        parsed_let_program: tuple[list[str], Program],
+        index: int,
+        expected_identifier: str,
+    ) -> None:
+        errors, program = parsed_let_program
+        assert errors == []
+        assert len(program.statements) == 3
+        statement = program.statements[index]
+        assert isinstance(statement, LetStatement)
+        assert self._test_let_statement(statement, expected_identifier)
+
+    def test_error_messages(self) -> None:
         input_ = """
         let x 5;
         let = 10;
         let 838838;
         """
-        expected_error_messages = (
-            "parser has 4 errors\n"
-            "parser error: expected next token to be =, got INT instead\n"
-            "parser error: expected next token to be IDENT, got = instead\n"
-            "parser error: no prefix parse function for = found\n"
-            "parser error: expected next token to be IDENT, got INT instead\n"
-        )
+        expected_error_messages = [
+            "expected next token to be =, got INT instead",
+            "expected next token to be IDENT, got = instead",
+            "no prefix parse function for = found",
+            "expected next token to be IDENT, got INT instead",
+        ]
 
         tokenizer = Tokenizer(input_)
         parser = Parser(tokenizer)
         parser.parse_program()
-        check_parser_errors(parser)
-        captured = capsys.readouterr()
-        from pprint import pprint
-
-        pprint(captured.out)
-        pprint(len(parser.errors))
-        assert captured.out == expected_error_messages
+        assert parser.errors == expected_error_messages
 
 
 class TestReturnStatement:
-    def test_statements(self) -> None:
-        input_ = """
-        return 5;
-        return 10;
-        return 838838;
-        """
-        expected_values = [5, 10, 838838]
-
-        tokenizer = Tokenizer(input_)
-        parser = Parser(tokenizer)
-        program = parser.parse_program()
-        check_parser_errors(parser)
-        assert len(program.statements) == len(expected_values)
-        for i, _ in enumerate(expected_values):
-            assert program.statements[i].token_literal() == TokenType.RETURN
+    @pytest.mark.parametrize("index", [0, 1, 2])
+    def test_statements(
+        self, parsed_return_program: tuple[list[str], Program], index: int
+    ) -> None:
+        errors, program = parsed_return_program
+        assert errors == []
+        assert len(program.statements) == 3
+        statement = program.statements[index]
+        assert isinstance(statement, ReturnStatement)
+        assert statement.token.type == _RETURN
+        assert statement.token_literal() == "return"
 
 
 class TestIdentifierExpression:
-    def test_expression(self) -> None:
-        input_ = "foobar;"
+    def test_expression(
+        self, parsed_identifier_program: tuple[list[str], Program]
+    ) -> None:
         expected_value = "foobar"
 
-        tokenizer = Tokenizer(input_)
-        parser = Parser(tokenizer)
-        program = parser.parse_program()
-        check_parser_errors(parser)
+        errors, program = parsed_identifier_program
+        assert errors == []
         assert len(program.statements) == 1
         assert program.statements[0].token_literal() == expected_value
 
 
 class TestIntegerLiteralExpression:
-    def test_integer_literal_expression(self) -> None:
-        input_ = "5;"
+    def test_integer_literal_expression(
+        self, parsed_integer_program: tuple[list[str], Program]
+    ) -> None:
         expected_value = 5
 
+        errors, program = parsed_integer_program
+        assert errors == []
+        assert len(program.statements) == 1
+        stmt = program.statements[0]
+        assert isinstance(stmt, ExpressionStatement)
+        assert stmt.token_literal() == str(expected_value)
+        assert isinstance(stmt.expression, IntegerLiteral)
+        assert stmt.expression.value == expected_value
+
+
+class TestParsingPrefixExpressions:
+    @pytest.mark.parametrize(
+        "input_,operator,integer_value", [("!5;", "!", 5), ("-11;", "-", 11)]
+    )
+    def test_simple_cases(self, input_: str, operator: str, integer_value: int) -> None:
         tokenizer = Tokenizer(input_)
         parser = Parser(tokenizer)
         program = parser.parse_program()
         check_parser_errors(parser)
         assert len(program.statements) == 1
-        assert isinstance(program.statements[0], ExpressionStatement)
-        assert isinstance(program.statements[0].expression, Expression)
-        assert program.statements[0].token_literal() == str(expected_value)
-        assert program.statements[0].expression.value == 5
 
+        stmt = program.statements[0]
+        assert isinstance(stmt, ExpressionStatement)
+        assert isinstance(stmt.expression, PrefixExpression)
+        assert stmt.expression.operator == operator
+        right = stmt.expression.right
+        assert isinstance(right, IntegerLiteral)
+        assert right.value == integer_value
+        assert right.token_literal() == str(integer_value)
 
-class TestParsingPrefixExpressions:
-    def test_simple_cases(self) -> None:
-        expected_operators = ["!", "-"]
-        expected_integer_values = [5, 11]
-        inputs: list[dict[str, str | int]] = [
-            {"input": "!5;", "operator": "!", "integer_value": 5},
-            {"input": "-11;", "operator": "-", "integer_value": 11},
-        ]
-        for i, operator, value in zip(
-            inputs, expected_operators, expected_integer_values
-        ):
-            tokenizer = Tokenizer(i["input"])
+
+class TestMissingSemicolon:
+    def test_statements_stop_at_eof(self) -> None:
+        for input_ in ["let x = 5", "return 5"]:
+            tokenizer = Tokenizer(input_)
             parser = Parser(tokenizer)
             program = parser.parse_program()
-            check_parser_errors(parser)
+            assert parser.errors == []
             assert len(program.statements) == 1
 
-            stmt = program.statements[0]
-            assert isinstance(stmt, ExpressionStatement)
-            assert isinstance(stmt.expression, PrefixExpression)
-            assert isinstance(stmt.expression, Expression)
-            assert i["operator"] == operator
-            assert i["integer_value"] == value
-            # TODO: 2025/1/20 ast.PrefixExpressionは未定義
+
+class _MemoParser(Parser):
+    parse_expression = memoize_if(True)(Parser.parse_expression)
+
+
+class _BoundedMemoParser(_MemoParser):
+    """next_tokenを呼べる回数に上限を設けた_MemoParser
+
+    解析が終わらなくなった場合に、テストが止まり続けずにAssertionErrorで失敗するようにする。
+    読み取り位置ごとのcurrent_tokenの種類も記録し、キャッシュのキーがどのトークンで始まる式のものかを調べられるようにする。
+    """
+
+    def __init__(self, tokenizer: Tokenizer, limit: int) -> None:
+        self.limit = limit
+        self.calls = 0
+        self.current_token_types: dict[int, int] = {}
+        super().__init__(tokenizer)
+
+    def next_token(self) -> None:
+        self.calls += 1
+        assert self.calls <= self.limit, "parser did not reach EOF"
+        super().next_token()
+        self.current_token_types[self.tokenizer.position] = self.current_token.type
+
+
+def _bounded_memo_parser(input_: str) -> tuple[Tokenizer, _BoundedMemoParser]:
+    tokenizer = Tokenizer(input_)
+    # next_tokenはトークンごとに1回と、先読みの2回と、EOFに達したときの1回まで呼ばれる
+    limit = len(tokenizer.tokenize_all()) + 3
+    return tokenizer, _BoundedMemoParser(tokenizer, limit)
+
+
+def _assert_primitives_not_cached(parser: _BoundedMemoParser) -> None:
+    cached_types = {
+        parser.current_token_types[position] for position, _ in parser._memo
+    }
+    assert TokenType.IDENT not in cached_types
+    assert TokenType.INT not in cached_types
+
+
+class TestMemoizeExpressions:
+    def test_disabled_returns_function_unchanged(self) -> None:
+        assert memoize_if(False)(Parser.parse_expression) is Parser.parse_expression
+
+    def test_enabled_caches_and_restores_position(self) -> None:
+        input_ = "-5; !x; 10;"
+        expected = Parser(Tokenizer(input_)).parse_program().string()
+
+        tokenizer, parser = _bounded_memo_parser(input_)
+        start = (tokenizer.position, parser.current_token, parser.peek_token)
+        program = parser.parse_program()
+        assert parser.errors == []
+        assert program.string() == expected
+        # プリミティブな5, x, 10はキャッシュしない
+        _assert_primitives_not_cached(parser)
+
+        # 解析を始めた状態に戻して解析し直すと、キャッシュから同じ式が返り解析後の位置も復元される
+        tokenizer.position, parser.current_token, parser.peek_token = start
+        expression = parser.parse_expression(Priority.LOWEST)
+        stmt = program.statements[0]
+        assert isinstance(stmt, ExpressionStatement)
+        assert expression is stmt.expression
+        assert parser.current_token.literal == "5"
+        assert parser.peek_token.type == TokenType.SEMICOLON
+
+    def test_primitives_skip_cache_with_errors(self) -> None:
+        input_ = "x; -; 5 +"
+        expected_parser = Parser(Tokenizer(input_))
+        expected = expected_parser.parse_program()
+
+        _, parser = _bounded_memo_parser(input_)
+        program = parser.parse_program()
+        assert parser.errors == expected_parser.errors
+        assert program.string() == expected.string()
+        # -の式と解析関数のないトークンはキャッシュするが、プリミティブなx, 5はキャッシュしない
+        assert parser._memo
+        _assert_primitives_not_cached(parser)
+
+    @pytest.mark.parametrize("input_", ["+ + + +", "; return ; + -", "!-"])
+    def test_enabled_with_errors_near_eof(self, input_: str) -> None:
+        # 入力の終わり付近で解析エラーになっても、キャッシュのキーが重ならず解析が終わる
+        expected_parser = Parser(Tokenizer(input_))
+        expected = expected_parser.parse_program()
+
+        tokenizer, parser = _bounded_memo_parser(input_)
+        program = parser.parse_program()
+        assert parser.errors == expected_parser.errors
+        assert program.string() == expected.string()
+        assert tokenizer.position <= parser.limit
+
+
+class TestPriority:
+    def test_peek_and_current_priority(self) -> None:
+        parser = Parser(Tokenizer("5 * 3"))
+        assert parser.current_priority() == Priority.LOWEST
+        assert parser.peek_priority() == Priority.PRODUCT
+        parser.next_token()
+        assert parser.current_priority() == Priority.PRODUCT
+        assert parser.peek_priority() == Priority.LOWEST
+        parser.next_token()
+        # 入力の終わりのEOFトークンは中置演算子ではない
+        assert parser.peek_priority() == Priority.LOWEST
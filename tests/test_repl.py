@@ -0,0 +1,45 @@
+import io
+import sys
+
+import pytest
+from pytest import CaptureFixture
+
+from ponkey.repl import REPL
+
+INPUT = "let x = 5;\nreturn x;\n-a;\n"
+# 対話的に1行ずつ入力したときと同じ、トークンの出力
+EXPECTED_OUTPUT = (
+    "Token ( type: let, literal: let )\n"
+    "Token ( type: IDENT, literal: x )\n"
+    "Token ( type: =, literal: = )\n"
+    "Token ( type: INT, literal: 5 )\n"
+    "Token ( type: ;, literal: ; )\n"
+    "Token ( type: return, literal: return )\n"
+    "Token ( type: IDENT, literal: x )\n"
+    "Token ( type: ;, literal: ; )\n"
+    "Token ( type: -, literal: - )\n"
+    "Token ( type: IDENT, literal: a )\n"
+    "Token ( type: ;, literal: ; )\n"
+)
+
+
+class TestRunStream:
+    def test_parses_whole_input_at_once(self, capsys: CaptureFixture[str]) -> None:
+        program = REPL().run_stream(INPUT)
+        assert len(program.statements) == 3
+        assert capsys.readouterr().out == EXPECTED_OUTPUT
+
+    def test_does_not_replace_displayhook(self) -> None:
+        displayhook = sys.displayhook
+        REPL().run_stream("5;")
+        assert sys.displayhook is displayhook
+
+
+class TestStart:
+    def test_piped_input_is_run_as_stream(
+        self, monkeypatch: pytest.MonkeyPatch, capsys: CaptureFixture[str]
+    ) -> None:
+        # StringIOはisattyがFalseなので、パイプから入力された場合と同じ分岐を通る
+        monkeypatch.setattr(sys, "stdin", io.StringIO(INPUT))
+        REPL().start()
+        assert capsys.readouterr().out == EXPECTED_OUTPUT